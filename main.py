@@ -1,56 +1,161 @@
 import streamlit as st
 st.set_page_config(page_title="EFI Portfolio Tracker", layout="wide")
-    
-
-import subprocess
-import sys
-
-@st.cache_resource()
-def install_latest_yfinance():
-    """Ensure the latest version of yfinance is installed."""
-    subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", "yfinance"], check=True)
-
-# Run the update before importing yfinance
-install_latest_yfinance()
 
 import time
-import cloudscraper
-import random
+import threading
+import queue
 import pandas as pd
+import numpy as np
 import datetime
 import os
 from supabase import create_client, Client
-import yfinance as yf
 from zoneinfo import ZoneInfo
-import altair as alt
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # -------------------------------------------------------------------------
 # 1) Supabase / Environment Setup
 # -------------------------------------------------------------------------
-url = st.secrets["SUPABASE_URL"]
-key = st.secrets["SUPABASE_KEY"]
-supabase: Client = create_client(url, key)
+@st.cache_resource
+def get_supabase_client() -> Client:
+    """Build the client once per process instead of on every script rerun."""
+    return create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"])
+
+supabase: Client = get_supabase_client()
 
 apiUrl = st.secrets["API"]
 baseURL = st.secrets["BASEAPI"]
 
+def script_thread_pool(max_workers: int) -> ThreadPoolExecutor:
+    """Thread pool whose workers can still call st.* / st.cache_* for this session."""
+    return ThreadPoolExecutor(
+        max_workers=max_workers,
+        initializer=add_script_run_ctx,
+        initargs=(None, get_script_run_ctx())
+    )
+
 # -------------------------------------------------------------------------
 # 2) Option Chain Fetch & Mid-Price Logic
 # -------------------------------------------------------------------------
-@st.cache_data(ttl=60*60)
-def get_options_chain(symbol: str):
-    time.sleep(1)  # simulate some network delay
-    full_url = f"{baseURL}?stock={symbol.upper()}&reqId={random.randint(1, 1000000)}"
-    scraper = cloudscraper.create_scraper()
-    response = scraper.get(full_url)
+# Chains are kept in one process-wide dict (shared by every session) and handed
+# back by reference; callers only read from them and must never mutate them.
+CHAIN_MAX_TTL = 60*60
+
+@st.cache_resource
+def _options_chain_store() -> dict:
+    """{SYMBOL: (chain_json, mid_price_table, expires_at_epoch)}"""
+    return {}
+
+@st.cache_resource
+def _chain_lock(symbol: str) -> threading.Lock:
+    """One lock per symbol, so concurrent misses on it trigger a single download."""
+    return threading.Lock()
+
+def _chain_ttl(data: dict) -> int:
+    """
+    Seconds to keep a chain: one minute per day until its nearest expiration,
+    so 0DTE/weekly chains refresh quickly while LEAPS-only chains stay an hour.
+    """
+    today = datetime.date.today()
+    days_out = []
+    for exp in data.get("options", {}):
+        try:
+            days_out.append((datetime.date.fromisoformat(exp) - today).days)
+        except ValueError:
+            continue
+    nearest = min((d for d in days_out if d >= 0), default=CHAIN_MAX_TTL // 60)
+    return min(max(nearest, 1) * 60, CHAIN_MAX_TTL)
+
+def _build_mid_price_table(data: dict) -> dict:
+    """Flatten a chain into {(expiration, "c"/"p", strike): mid} for every quote with a valid ask."""
+    table = {}
+    for exp, by_cp in data.get("options", {}).items():
+        for cp_key, strikes in by_cp.items():
+            for strike_key, option_data in strikes.items():
+                bid = option_data.get("b", 0)
+                ask = option_data.get("a", 0)
+                if ask > 0:
+                    table[(exp, cp_key, round(float(strike_key), 2))] = (bid + ask) / 2
+    return table
+
+def get_chain_entry(symbol: str):
+    """
+    (chain_json, mid_price_table) for a symbol, downloading it when the cached
+    copy has expired. Returns (None, {}) when the download fails.
+    """
+    store = _options_chain_store()
+    key = symbol.upper()
+
+    # Drop every expired chain, not just this one, so symbols that are no longer
+    # held (or were only typed once into the "(New)" form) don't stay in memory
+    now = time.time()
+    for k, entry in list(store.items()):
+        if entry[2] <= now:
+            store.pop(k, None)
+
+    with _chain_lock(key):
+        cached = store.get(key)
+        if cached and cached[2] > time.time():
+            return cached[0], cached[1]
+
+        data = _download_options_chain(symbol)
+        if data is None:
+            return None, {}
+        table = _build_mid_price_table(data)
+        store[key] = (data, table, time.time() + _chain_ttl(data))
+        return data, table
+
+@st.cache_resource
+def _scraper_pool() -> queue.Queue:
+    """
+    Process-wide pool of idle scrapers. Script-run threads and refresh workers
+    are short-lived, so scrapers live here instead, keeping their TLS connections
+    and Cloudflare cookies across downloads. CloudScraper is a requests.Session
+    that mutates its own state per request, so each one is used by one thread at a time.
+    """
+    return queue.Queue()
+
+@contextmanager
+def _checked_out_scraper():
+    """Borrow an idle scraper (creating one only when none is free) and return it afterwards."""
+    pool = _scraper_pool()
+    try:
+        scraper = pool.get_nowait()
+    except queue.Empty:
+        import cloudscraper  # deferred: only option-chain downloads need it
+        scraper = cloudscraper.create_scraper()
+    try:
+        yield scraper
+    finally:
+        pool.put(scraper)
+
+def _download_options_chain(symbol: str):
+    # reqId changes once a minute, so HTTP/edge caches can serve repeats within that window
+    full_url = f"{baseURL}?stock={symbol.upper()}&reqId={int(time.time() // 60)}"
+    with _checked_out_scraper() as scraper:
+        response = scraper.get(full_url)
     if response.status_code == 200:
-        return response.json()
+        import orjson  # chains run to megabytes; orjson parses them several times faster than json
+        return orjson.loads(response.content)
     else:
         st.error(f"❌ Failed to fetch options chain for {symbol}. Status code: {response.status_code}")
         return None
 
 def fetch_option_price(symbol: str, expiration: str, strike: float, call_put: str) -> float:
-    data = get_options_chain(symbol)
+    chain, table = get_chain_entry(symbol)
+    return _price_from_table(table, chain, symbol, expiration, strike, call_put)
+
+def _price_from_table(table: dict, chain: dict, symbol: str, expiration: str, strike: float, call_put: str) -> float:
+    """Mid-price via one flat-table lookup; misses fall back to the chain walk for a precise error."""
+    cp_key = "c" if call_put.upper() == "CALL" else "p"
+    mid_price = table.get((expiration, cp_key, round(float(strike), 2)))
+    if mid_price is None:
+        return _lookup_in_chain(chain, symbol, expiration, strike, call_put)
+    return mid_price
+
+def _lookup_in_chain(data: dict, symbol: str, expiration: str, strike: float, call_put: str) -> float:
+    """Mid-price for one contract, read from an already-fetched option chain."""
     if not data or "options" not in data:
         raise ValueError("Option chain data not found or invalid JSON structure.")
 
@@ -79,55 +184,144 @@ def fetch_option_price(symbol: str, expiration: str, strike: float, call_put: st
 # -------------------------------------------------------------------------
 # 3) Fetch Current Prices (Shares)
 # -------------------------------------------------------------------------
-def fetch_share_price(ticker: str) -> float:
+# Widget reruns would otherwise hit Yahoo on every keystroke in the Shares form.
+# Failures raise instead of returning, so st.cache_data never stores them.
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_share_price(ticker: str) -> float:
+    import yfinance as yf  # deferred: yfinance is slow to import and only price fetches need it
+    data = yf.Ticker(ticker).history(period="1d")
+    if len(data) == 0:
+        raise ValueError(f"No price data returned for {ticker}.")
+    return float(data["Close"].iloc[-1])
+
+def fetch_share_price(ticker: str, fresh: bool = False) -> float:
+    """Latest close for one ticker; `fresh` drops just this ticker's cached quote first."""
+    if fresh:
+        _cached_share_price.clear(ticker)
     try:
-        data = yf.Ticker(ticker).history(period="1d")
-        if len(data) > 0:
-            return float(data["Close"].iloc[-1])
-    except:
+        return _cached_share_price(ticker)
+    except Exception:
         st.error(f'❌ Failed Fetching {ticker} Price')
     return 0.0
 
+YF_BATCH_SIZE = 20  # Yahoo caps the number of symbols per multi-symbol request
+
+def fetch_share_prices(tickers: list) -> dict:
+    """
+    Fetch the latest close for many tickers with one yf.download per
+    batch of YF_BATCH_SIZE symbols instead of one request per ticker.
+    Returns {ticker: price}; tickers that fail come back as 0.0.
+    """
+    import yfinance as yf
+    prices = {}
+    for i in range(0, len(tickers), YF_BATCH_SIZE):
+        batch = tickers[i:i + YF_BATCH_SIZE]
+        try:
+            data = yf.download(
+                tickers=" ".join(batch),
+                period="1d",
+                group_by="ticker",
+                threads=True,
+                progress=False
+            )
+        except Exception:
+            st.error(f'❌ Failed Fetching Prices for {", ".join(batch)}')
+            data = pd.DataFrame()
+
+        for ticker in batch:
+            price = 0.0
+            try:
+                closes = data[ticker]["Close"] if isinstance(data.columns, pd.MultiIndex) else data["Close"]
+                closes = closes.dropna()
+                if len(closes) > 0:
+                    price = float(closes.iloc[-1])
+            except KeyError:
+                st.error(f'❌ Failed Fetching {ticker} Price')
+            prices[ticker] = price
+    return prices
+
 # -------------------------------------------------------------------------
 # 4) Database CRUD Helpers
 # -------------------------------------------------------------------------
+# Loaders are cached briefly so one page render reuses a single SELECT per table;
+# every write below clears the matching loader so changes show up immediately.
+DB_CACHE_TTL = 30
+
+# Only the columns the app actually reads are requested from PostgREST.
+# unrealized_pl is derived by the loaders rather than selected, so the UI never
+# shows a value that drifted from its inputs. It is still written on every
+# change, because the stored column is a plain column. Drop it from the writes
+# once it has been made a GENERATED column in the Supabase SQL editor:
+#   ALTER TABLE portfolio_shares DROP COLUMN unrealized_pl, ADD COLUMN unrealized_pl NUMERIC
+#     GENERATED ALWAYS AS ((current_price - avg_cost) * shares_held) STORED;
+#   ALTER TABLE portfolio_options DROP COLUMN unrealized_pl, ADD COLUMN unrealized_pl NUMERIC
+#     GENERATED ALWAYS AS ((current_price - avg_cost) * contracts_held * 100) STORED;
+SHARES_COLUMNS = "ticker,shares_held,avg_cost,current_price"
+OPTIONS_COLUMNS = "id,symbol,call_put,expiration,strike,contracts_held,avg_cost,current_price"
+
+@st.cache_data(ttl=DB_CACHE_TTL, show_spinner=False)
 def load_settings() -> pd.DataFrame:
-    resp = supabase.table("settings").select("*").eq("id", 1).execute()
+    resp = supabase.table("settings").select("original_capital").eq("id", 1).execute()
     data = resp.data
     return pd.DataFrame(data) if data else pd.DataFrame()
 
 def save_settings(original_capital: float):
     supabase.table("settings").upsert({"id": 1, "original_capital": original_capital}, on_conflict="id").execute()
-    st.rerun()
+    load_settings.clear()
+
+def load_portfolio(concurrent: bool = False):
+    """
+    (settings_df, shares_df, opt_df). Renders call the loaders directly, since
+    they are usually warm cache hits. The refresh sweep passes concurrent=True,
+    where the caches are likely cold and the three SELECTs are worth running in
+    parallel (about one round-trip instead of three).
+    """
+    if not concurrent:
+        return load_settings(), load_shares(), load_options()
+    with script_thread_pool(3) as ex:
+        settings_fut = ex.submit(load_settings)
+        shares_fut = ex.submit(load_shares)
+        opts_fut = ex.submit(load_options)
+    return settings_fut.result(), shares_fut.result(), opts_fut.result()
 
 # ---- SHARES ----
+@st.cache_data(ttl=DB_CACHE_TTL, show_spinner=False)
 def load_shares() -> pd.DataFrame:
-    resp = supabase.table("portfolio_shares").select("*").execute()
+    resp = supabase.table("portfolio_shares").select(SHARES_COLUMNS).execute()
     data = resp.data
-    return pd.DataFrame(data) if data else pd.DataFrame()
+    if not data:
+        return pd.DataFrame()
+    df = pd.DataFrame(data)
+    df["unrealized_pl"] = (df["current_price"] - df["avg_cost"]) * df["shares_held"]
+    return df
 
 def upsert_share(ticker: str, shares_held: float, avg_cost: float, current_price: float):
-    unreal_pl = (current_price - avg_cost) * shares_held
     supabase.table("portfolio_shares").upsert({
         "ticker": ticker,
         "shares_held": shares_held,
         "avg_cost": avg_cost,
         "current_price": current_price,
-        "unrealized_pl": unreal_pl
+        "unrealized_pl": (current_price - avg_cost) * shares_held
     }, on_conflict="ticker").execute()
+    load_shares.clear()
 
-def delete_share(ticker: str):
-    supabase.table("portfolio_shares").delete().eq("ticker", ticker).execute()
+def delete_shares(tickers: list):
+    supabase.table("portfolio_shares").delete().in_("ticker", tickers).execute()
+    load_shares.clear()
 
 # ---- OPTIONS ----
+@st.cache_data(ttl=DB_CACHE_TTL, show_spinner=False)
 def load_options() -> pd.DataFrame:
-    resp = supabase.table("portfolio_options").select("*").execute()
+    resp = supabase.table("portfolio_options").select(OPTIONS_COLUMNS).execute()
     data = resp.data
-    return pd.DataFrame(data) if data else pd.DataFrame()
+    if not data:
+        return pd.DataFrame()
+    df = pd.DataFrame(data)
+    df["unrealized_pl"] = (df["current_price"] - df["avg_cost"]) * df["contracts_held"] * 100
+    return df
 
 def upsert_option(opt_id: int, symbol: str, call_put: str, expiration: str, strike: float,
                   contracts_held: float, avg_cost: float, current_price: float):
-    unreal_pl = (current_price - avg_cost) * (contracts_held * 100)
     data_dict = {
         "symbol": symbol,
         "call_put": call_put,
@@ -136,30 +330,38 @@ def upsert_option(opt_id: int, symbol: str, call_put: str, expiration: str, stri
         "contracts_held": contracts_held,
         "avg_cost": avg_cost,
         "current_price": current_price,
-        "unrealized_pl": unreal_pl
+        "unrealized_pl": (current_price - avg_cost) * contracts_held * 100
     }
     if opt_id is None:
         supabase.table("portfolio_options").insert(data_dict).execute()
     else:
         supabase.table("portfolio_options").update(data_dict).eq("id", opt_id).execute()
+    load_options.clear()
 
-def delete_option(row_id: int):
-    supabase.table("portfolio_options").delete().eq("id", row_id).execute()
+def delete_options(row_ids: list):
+    supabase.table("portfolio_options").delete().in_("id", row_ids).execute()
+    load_options.clear()
 
 # ---- PERFORMANCE ----
+@st.cache_data(ttl=DB_CACHE_TTL, show_spinner=False)
 def load_performance() -> pd.DataFrame:
-    resp = supabase.table("performance").select("*").execute()
+    resp = supabase.table("performance").select("date,total_value").order("date").execute()
     data = resp.data
     return pd.DataFrame(data) if data else pd.DataFrame()
 
 def upsert_performance(date_str: str, total_value: float):
     supabase.table("performance").upsert({"date": date_str, "total_value": total_value}, on_conflict="date").execute()
+    load_performance.clear()
 
 # ---- ACTIVITY LOG ----
+# The newest-15 query relies on a descending index so Postgres reads 15 rows
+# instead of sorting the whole log. One-time setup in the Supabase SQL editor:
+#   CREATE INDEX IF NOT EXISTS portfolio_activity_id_desc ON portfolio_activity (id DESC);
+@st.cache_data(ttl=10, show_spinner=False)
 def load_activity() -> pd.DataFrame:
     resp = (
         supabase.table("portfolio_activity")
-        .select("*")
+        .select("message")
         .order("id", desc=True)
         .limit(15)
         .execute()
@@ -168,111 +370,209 @@ def load_activity() -> pd.DataFrame:
 
 def log_activity(message: str):
     supabase.table("portfolio_activity").insert({"message": message}).execute()
+    load_activity.clear()
 
 # -------------------------------------------------------------------------
 # 5) Automatic Refresh (Once Per Session)
 # -------------------------------------------------------------------------
-def refresh_shares_prices():
-    shares_df = load_shares()
+def refresh_shares_prices(shares_df: pd.DataFrame) -> pd.DataFrame:
+    """Reprice the given shares, store them, and return the updated frame."""
     if shares_df.empty:
-        return
-    for idx, row in shares_df.iterrows():
-        ticker = row["ticker"]
-        shares_held = float(row["shares_held"])
-        avg_cost = float(row["avg_cost"])
-        current_px = fetch_share_price(ticker)
-        unreal_pl = (current_px - avg_cost) * shares_held
-
-        supabase.table("portfolio_shares").upsert({
-            "ticker": ticker,
-            "shares_held": shares_held,
-            "avg_cost": avg_cost,
-            "current_price": current_px,
-            "unrealized_pl": unreal_pl
-        }, on_conflict="ticker").execute()
-
-def refresh_options_prices():
-    opt_df = load_options()
+        return shares_df
+    shares_df = shares_df.astype({"shares_held": float, "avg_cost": float})
+    prices = fetch_share_prices(shares_df["ticker"].tolist())
+
+    shares_df["current_price"] = shares_df["ticker"].map(prices).fillna(0.0)
+    shares_df["unrealized_pl"] = (shares_df["current_price"] - shares_df["avg_cost"]) * shares_df["shares_held"]
+    rows = shares_df[["ticker", "shares_held", "avg_cost", "current_price", "unrealized_pl"]].to_dict("records")
+
+    # One bulk upsert instead of a round-trip per ticker
+    supabase.table("portfolio_shares").upsert(rows, on_conflict="ticker").execute()
+    load_shares.clear()
+    return shares_df
+
+def refresh_options_prices(opt_df: pd.DataFrame) -> pd.DataFrame:
+    """Reprice the given options, store them, and return the updated frame."""
     if opt_df.empty:
-        return
-    for idx, row in opt_df.iterrows():
-        opt_id = row["id"]
-        symbol = row["symbol"]
-        call_put = row["call_put"]
-        expiration_dt = row["expiration"]
-        expiration_str = expiration_dt.strftime("%Y-%m-%d") if not isinstance(expiration_dt, str) else expiration_dt
-
-        strike = float(row["strike"])
-        contracts_held = float(row["contracts_held"])
-        avg_cost = float(row["avg_cost"])
-
-        current_px = fetch_option_price(symbol, expiration_str, strike, call_put)
-        unreal_pl = (current_px - avg_cost) * contracts_held * 100
-
-        supabase.table("portfolio_options").update({
-            "symbol": symbol,
-            "call_put": call_put,
-            "expiration": expiration_str,
-            "strike": strike,
-            "contracts_held": contracts_held,
-            "avg_cost": avg_cost,
-            "current_price": current_px,
-            "unrealized_pl": unreal_pl
-        }).eq("id", opt_id).execute()
-
-def refresh():
-    time.sleep(1)
+        return opt_df
+    opt_df = opt_df.astype({"strike": float, "contracts_held": float, "avg_cost": float})
+    opt_df["expiration"] = (
+        pd.to_datetime(opt_df["expiration"], errors="coerce")
+        .dt.strftime("%Y-%m-%d")
+        .fillna(opt_df["expiration"].astype(str))
+    )
+
+    # Fetch each symbol's chain once (concurrently, the calls are pure network wait)
+    # and price every strike/expiration held against it
+    symbols = opt_df["symbol"].unique().tolist()
+    with script_thread_pool(8) as ex:
+        entries = dict(zip(symbols, ex.map(get_chain_entry, symbols)))
+
+    current_px = {}
+    for symbol, grp in opt_df.groupby("symbol"):
+        chain, table = entries[symbol]
+        for row in grp.itertuples():
+            current_px[row.Index] = _price_from_table(table, chain, symbol, row.expiration, row.strike, row.call_put)
+    opt_df["current_price"] = pd.Series(current_px)
+    opt_df["unrealized_pl"] = (opt_df["current_price"] - opt_df["avg_cost"]) * opt_df["contracts_held"] * 100
+    rows = opt_df[[
+        "id", "symbol", "call_put", "expiration", "strike", "contracts_held",
+        "avg_cost", "current_price", "unrealized_pl"
+    ]].to_dict("records")
+
+    # Rows carry their existing id, so upserting on "id" updates them all in one call
+    supabase.table("portfolio_options").upsert(rows, on_conflict="id").execute()
+    load_options.clear()
+    return opt_df
+
+def refresh(message: str = None):
+    """Rerun right away; `message` is shown as a toast at the start of the next run."""
+    if message:
+        st.session_state["flash_msg"] = message
     st.rerun()
 
-def record_daily_performance():
+def compute_totals(settings_df: pd.DataFrame, shares_df: pd.DataFrame, opt_df: pd.DataFrame) -> dict:
     """
-    Sums up:
-      - total value in shares
-      - total value in options
-      - plus unused capital (buying power)
-    Then upserts into the 'performance' table using today's date.
+    Account figures shared by the daily performance record and the dashboard:
+      - original_capital, buying_power, total_account_val
+      - total_shares_val / total_opts_val (market value)
+      - spent_shares_val / spent_opts_val (cost basis)
+      - shares_pos_val, shares_invested, opts_pos_val, opts_invested:
+        per-position arrays for the dashboard tables, in frame row order
     """
-    shares_df = load_shares()
-    total_shares_val = (shares_df["shares_held"] * shares_df["current_price"]).sum() if not shares_df.empty else 0.0
-
-    opt_df = load_options()
-    total_opts_val = ((opt_df["contracts_held"] * 100) * opt_df["current_price"]).sum() if not opt_df.empty else 0.0
+    # Scalar totals are one dot product per value column; the per-position
+    # products are only kept around for the table columns
+    if not shares_df.empty:
+        sh = shares_df[["shares_held", "current_price", "avg_cost"]].to_numpy(dtype=float)
+        total_shares_val = float(sh[:, 0] @ sh[:, 1])
+        spent_shares_val = float(sh[:, 0] @ sh[:, 2])
+        shares_pos_val = sh[:, 0] * sh[:, 1]
+        shares_invested = sh[:, 0] * sh[:, 2]
+    else:
+        total_shares_val, spent_shares_val = 0.0, 0.0
+        shares_pos_val = shares_invested = np.zeros(0)
+
+    if not opt_df.empty:
+        op = opt_df[["contracts_held", "current_price", "avg_cost"]].to_numpy(dtype=float)
+        total_opts_val = float(op[:, 0] @ op[:, 1]) * 100
+        spent_opts_val = float(op[:, 0] @ op[:, 2]) * 100
+        op_units = op[:, 0] * 100
+        opts_pos_val = op_units * op[:, 1]
+        opts_invested = op_units * op[:, 2]
+    else:
+        total_opts_val, spent_opts_val = 0.0, 0.0
+        opts_pos_val = opts_invested = np.zeros(0)
 
-    settings_df = load_settings()
     if not settings_df.empty:
-        original_cap_def = float(settings_df.iloc[0]["original_capital"])
+        original_capital = float(settings_df.iloc[0]["original_capital"])
     else:
-        original_cap_def = 0.0
+        original_capital = 0.0
+
+    buying_power = original_capital - spent_shares_val - spent_opts_val
+
+    return {
+        "original_capital": original_capital,
+        "total_shares_val": total_shares_val,
+        "total_opts_val": total_opts_val,
+        "spent_shares_val": spent_shares_val,
+        "spent_opts_val": spent_opts_val,
+        "buying_power": buying_power,
+        "total_account_val": total_shares_val + total_opts_val + buying_power,
+        "shares_pos_val": shares_pos_val,
+        "shares_invested": shares_invested,
+        "opts_pos_val": opts_pos_val,
+        "opts_invested": opts_invested
+    }
 
-    spent_shares_val = (shares_df["shares_held"] * shares_df["avg_cost"]).sum() if not shares_df.empty else 0.0
-    spent_opts_val = ((opt_df["contracts_held"] * 100) * opt_df["avg_cost"]).sum() if not opt_df.empty else 0.0
-    buying_power = original_cap_def - spent_shares_val - spent_opts_val
-    total_val = float(total_shares_val + total_opts_val + buying_power)
+def record_daily_performance(settings_df: pd.DataFrame, shares_df: pd.DataFrame, opt_df: pd.DataFrame):
+    """
+    Upserts today's total account value (shares + options + buying power,
+    from the frames the refresh just produced) into the 'performance' table,
+    unless today's stored value is already the same.
+    """
+    total_val = compute_totals(settings_df, shares_df, opt_df)["total_account_val"]
 
     today_str = datetime.date.today().strftime("%Y-%m-%d")
+
+    # Another session may already have recorded the same total today; skip the write then
+    today_row = supabase.table("performance").select("total_value").eq("date", today_str).limit(1).execute()
+    if today_row.data and abs(float(today_row.data[0]["total_value"]) - total_val) < 0.01:
+        return
     upsert_performance(today_str, total_val)
 
+REFRESH_INTERVAL = datetime.timedelta(minutes=5)
+
+@st.cache_resource
+def _last_refresh() -> dict:
+    """Process-wide {"at": datetime} of the last full price sweep, shared by all sessions."""
+    return {"at": None}
+
+@st.cache_resource
+def _refresh_lock() -> threading.Lock:
+    """Guards _last_refresh() so only one session claims each sweep."""
+    return threading.Lock()
+
 def refresh_all_once():
     if "did_refresh" not in st.session_state:
         st.session_state["did_refresh"] = False
 
     if not st.session_state["did_refresh"]:
-        with st.spinner('Fetching Position Values...'):
-            refresh_shares_prices()
-            refresh_options_prices()
-            record_daily_performance()
-            st.session_state["did_refresh"] = True
+        # A new session during or right after another one's sweep just reuses the
+        # stored prices. The slot is claimed before sweeping, so parallel
+        # yf.download calls from overlapping sweeps can't mix up each other's frames.
+        last = _last_refresh()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with _refresh_lock():
+            due = last["at"] is None or now - last["at"] >= REFRESH_INTERVAL
+            if due:
+                previous, last["at"] = last["at"], now
+
+        if due:
+            try:
+                with st.spinner('Fetching Position Values...'):
+                    # Load once and hand the refreshed frames along instead of re-selecting them
+                    settings_df, shares_df, opt_df = load_portfolio(concurrent=True)
+                    shares_df = refresh_shares_prices(shares_df)
+                    opt_df = refresh_options_prices(opt_df)
+                    record_daily_performance(settings_df, shares_df, opt_df)
+            except BaseException:
+                # Give the slot back so the next session retries the sweep
+                with _refresh_lock():
+                    last["at"] = previous
+                raise
+        st.session_state["did_refresh"] = True
 
 # -------------------------------------------------------------------------
-# 6) Helper for Color-coding Unrealized P/L cells
+# 6) Table Formatting & Color-coding Unrealized P/L cells
 # -------------------------------------------------------------------------
-def color_unreal_pl(val):
-    if val > 0:
-        return "color: #65FE08"
-    elif val < 0:
-        return "color: red"
-    else:
-        return ""
+# Plain format strings let the Styler skip a Python callback per cell
+MONEY_FMT = "${:,.2f}"
+PERCENT_FMT = "{:,.2f}%"
+
+SHARES_TABLE_FORMAT = {
+    "Shares": "{:.2f}",
+    "Avg Cost": MONEY_FMT,
+    "Current Price": MONEY_FMT,
+    "Currently Invested": MONEY_FMT,
+    "Position Value": MONEY_FMT,
+    "Unrealized P/L": MONEY_FMT,
+    "% of Portfolio": PERCENT_FMT
+}
+
+OPTIONS_TABLE_FORMAT = {
+    "Strike": MONEY_FMT,
+    "Contracts": "{:.2f}",
+    "Avg Cost": MONEY_FMT,
+    "Current Price": MONEY_FMT,
+    "Currently Invested": MONEY_FMT,
+    "Position Value": MONEY_FMT,
+    "Unrealized P/L": MONEY_FMT,
+    "% of Portfolio": PERCENT_FMT
+}
+
+def color_unreal_pl(col: pd.Series):
+    # Styles the whole column in one call (Styler.apply) rather than once per cell
+    return np.where(col > 0, "color: #65FE08", np.where(col < 0, "color: red", ""))
 
 # -------------------------------------------------------------------------
 # 7) Logging Activity: shares or options
@@ -318,6 +618,9 @@ def log_options_activity(opt_id, symbol, call_put, expiration, strike, contracts
 # 8) Main App with Password Gate
 # -------------------------------------------------------------------------
 def main():
+    # Feedback from the action that triggered this rerun
+    if "flash_msg" in st.session_state:
+        st.toast(st.session_state.pop("flash_msg"))
 
     # Initialize 'is_admin' in session state
     if "is_admin" not in st.session_state:
@@ -356,25 +659,18 @@ def show_portfolio_data(is_admin: bool):
     Show the entire portfolio data, with or without editing widgets
     based on is_admin boolean.
     """
-    # 1) Load settings
-    settings_df = load_settings()
-    if not settings_df.empty:
-        original_cap_def = float(settings_df.iloc[0]["original_capital"])
-    else:
-        original_cap_def = 0.0
-
-    # 2) Basic account stats
-    shares_df = load_shares()
-    total_shares_val = (shares_df["shares_held"] * shares_df["current_price"]).sum() if not shares_df.empty else 0.0
-
-    opt_df = load_options()
-    total_opts_val = ((opt_df["contracts_held"] * 100) * opt_df["current_price"]).sum() if not opt_df.empty else 0.0
-
-    spent_shares_val = (shares_df["shares_held"] * shares_df["avg_cost"]).sum() if not shares_df.empty else 0.0
-    spent_opts_val = ((opt_df["contracts_held"] * 100) * opt_df["avg_cost"]).sum() if not opt_df.empty else 0.0
-
-    buying_power = original_cap_def - spent_shares_val - spent_opts_val
-    total_account_val = float(total_shares_val + total_opts_val + buying_power)
+    # 1) Load settings, shares and options together
+    settings_df, shares_df, opt_df = load_portfolio()
+
+    # 2) Basic account stats; the per-position arrays are reused for the table columns below
+    totals = compute_totals(settings_df, shares_df, opt_df)
+    original_cap_def = totals["original_capital"]
+    total_shares_val = totals["total_shares_val"]
+    total_opts_val = totals["total_opts_val"]
+    buying_power = totals["buying_power"]
+    total_account_val = totals["total_account_val"]
+    shares_pos_val, shares_invested = totals["shares_pos_val"], totals["shares_invested"]
+    opts_pos_val, opts_invested = totals["opts_pos_val"], totals["opts_invested"]
     percent_bp = (buying_power / total_account_val * 100) if total_account_val != 0 else 0
 
     colA = st.columns(5)
@@ -419,7 +715,7 @@ def show_portfolio_data(is_admin: bool):
     if is_admin:
         if st.button("💾 Save Original Capital"):
             save_settings(st.session_state["orig_capital"])
-            st.success("💾 Saved Original Capital!")
+            refresh("💾 Saved Original Capital!")
 
     st.write("---")
 
@@ -429,8 +725,8 @@ def show_portfolio_data(is_admin: bool):
         if activity_df.empty:
             st.write("No activity yet.")
         else:
-            for idx, row in activity_df.iterrows():
-                st.markdown(f"• {row['message']}", unsafe_allow_html=True)
+            # One markdown element for the whole log instead of one per entry
+            st.markdown("\n\n".join(f"• {msg}" for msg in activity_df["message"]), unsafe_allow_html=True)
 
     st.write("---")
 
@@ -440,46 +736,32 @@ def show_portfolio_data(is_admin: bool):
     # --------------------- SHARES TAB ---------------------
     with tab_shares:
         st.markdown("## Shares Portfolio 🚀")
-        shares_df = load_shares()
         if shares_df.empty:
             st.info("No shares in portfolio yet. Add some below! 🌱" if is_admin else "No shares in portfolio yet.")
         else:
-            df_disp = shares_df.copy()
-            df_disp["Position Value"] = df_disp["shares_held"] * df_disp["current_price"]
-            df_disp["Currently Invested"] = df_disp["shares_held"] * df_disp["avg_cost"]
-            if total_account_val > 0:
-                df_disp["% of Portfolio"] = (df_disp["Position Value"] / total_account_val) * 100
-            else:
-                df_disp["% of Portfolio"] = 0
-
-            df_disp = df_disp[[
-                "ticker", "shares_held", "avg_cost", "current_price",
-                "Currently Invested", "Position Value", "unrealized_pl", "% of Portfolio"
-            ]]
-
-            df_disp = df_disp.rename(columns={
+            # shares_df is this run's own copy (st.cache_data hands out a fresh one per call),
+            # so the derived columns go straight onto it; the display subset below is then
+            # the only copy made, and it is relabelled in place rather than via rename()
+            shares_df["Position Value"] = shares_pos_val
+            shares_df["Currently Invested"] = shares_invested
+            shares_df["% of Portfolio"] = (shares_pos_val / total_account_val) * 100 if total_account_val > 0 else 0
+            display_cols = {
                 "ticker": "Ticker",
                 "shares_held": "Shares",
                 "avg_cost": "Avg Cost",
                 "current_price": "Current Price",
-                "unrealized_pl": "Unrealized P/L"
-            })
-
-            def money(x): return f"${x:,.2f}"
-            def percent(x): return f"{x:,.2f}%"
+                "Currently Invested": "Currently Invested",
+                "Position Value": "Position Value",
+                "unrealized_pl": "Unrealized P/L",
+                "% of Portfolio": "% of Portfolio"
+            }
+            df_disp = shares_df[list(display_cols)]
+            df_disp.columns = list(display_cols.values())
 
             styled_shares = (
                 df_disp.style
-                .format({
-                    "Shares": "{:.2f}",
-                    "Avg Cost": money,
-                    "Current Price": money,
-                    "Currently Invested": money,
-                    "Position Value": money,
-                    "Unrealized P/L": money,
-                    "% of Portfolio": percent
-                })
-                .map(color_unreal_pl, subset=["Unrealized P/L"])
+                .format(SHARES_TABLE_FORMAT)
+                .apply(color_unreal_pl, subset=["Unrealized P/L"])
             )
             row_height = 40  
             num_rows = len(df_disp)
@@ -489,7 +771,8 @@ def show_portfolio_data(is_admin: bool):
         # Show editing form only if admin
         if is_admin:
             st.subheader("Add / Update Shares 🏗️")
-            tickers_list = shares_df["ticker"].tolist() if not shares_df.empty else []
+            shares_by_ticker = shares_df.set_index("ticker").to_dict("index") if not shares_df.empty else {}
+            tickers_list = list(shares_by_ticker)
             sel_share = st.selectbox("Select existing Ticker or create new", tickers_list + ["(New)"])
 
             if sel_share == "(New)":
@@ -498,75 +781,64 @@ def show_portfolio_data(is_admin: bool):
                 old_shares, old_avg = 0.0, 0.0
             else:
                 ticker_val = sel_share
-                existing_row = shares_df[shares_df["ticker"] == ticker_val]
-                if not existing_row.empty:
-                    old_shares = float(existing_row["shares_held"].iloc[0])
-                    old_avg = float(existing_row["avg_cost"].iloc[0])
+                existing_row = shares_by_ticker.get(ticker_val)
+                if existing_row is not None:
+                    old_shares = float(existing_row["shares_held"])
+                    old_avg = float(existing_row["avg_cost"])
                 else:
                     old_shares, old_avg = 0.0, 0.0
 
-            shares_to_add = st.number_input("Shares to Add (negative to reduce)", step=1.0)
-            purchase_price = st.number_input(
-                "Filled Price per share",
-                value=fetch_share_price(ticker_val) if ticker_val else 0.0,
-                step=1.0
-            )
+            # The quantity/price inputs sit in a form so typing in them doesn't rerun the
+            # whole page (and its Supabase/Yahoo reads) until Submit is pressed
+            with st.form("add_shares"):
+                shares_to_add = st.number_input("Shares to Add (negative to reduce)", step=1.0)
+                purchase_price = st.number_input(
+                    "Filled Price per share",
+                    value=fetch_share_price(ticker_val) if ticker_val else 0.0,
+                    step=1.0
+                )
+                submitted_shares = st.form_submit_button("Submit (Shares)")
 
-            if st.button("Submit (Shares)"):
+            if submitted_shares:
                 total_shares = old_shares + shares_to_add
                 if total_shares < 0:
                     st.error("Cannot have negative total shares.")
                     st.stop()
                 elif total_shares == 0:
-                    delete_share(ticker_val)
-                    st.warning(f"Position closed for {ticker_val}.")
+                    delete_shares([ticker_val])
                     # Log the activity
                     if shares_to_add != 0:
                         log_shares_activity(ticker_val, shares_to_add, purchase_price)
-                    refresh()
+                    refresh(f"Position closed for {ticker_val}.")
                 else:
                     new_avg = 0.0
                     if (old_shares + shares_to_add) != 0:
                         new_avg = (old_shares * old_avg + shares_to_add * purchase_price) / (old_shares + shares_to_add)
 
-                    current_px = fetch_share_price(ticker_val)
+                    current_px = fetch_share_price(ticker_val, fresh=True)
                     upsert_share(ticker_val, total_shares, new_avg, current_px)
 
                     if shares_to_add != 0:
                         log_shares_activity(ticker_val, shares_to_add, purchase_price)
-                    st.success(f"✅ Updated {ticker_val} with total shares={total_shares:.2f}, avg_cost={new_avg:.2f}")
-                    refresh()
+                    refresh(f"✅ Updated {ticker_val} with total shares={total_shares:.2f}, avg_cost={new_avg:.2f}")
 
-            st.subheader("Delete Entire Share Position 🗑️")
-            del_ticker_sh = st.selectbox("Select Ticker to Delete Entirely", ["(None)"] + tickers_list)
-            if del_ticker_sh != "(None)":
+            st.subheader("Delete Entire Share Positions 🗑️")
+            del_tickers_sh = st.multiselect("Select Tickers to Delete Entirely", tickers_list)
+            if del_tickers_sh:
                 if st.button("Confirm Delete (Shares)"):
-                    delete_share(del_ticker_sh)
-                    st.warning(f"🗑️ Deleted entire {del_ticker_sh} share position.")
-                    refresh()
+                    delete_shares(del_tickers_sh)
+                    refresh(f"🗑️ Deleted entire {', '.join(del_tickers_sh)} share position(s).")
 
     # --------------------- OPTIONS TAB ---------------------
     with tab_opts:
         st.markdown("## Options Portfolio 🔧")
-        opt_df = load_options()
         if opt_df.empty:
             st.info("No options in portfolio yet." if not is_admin else "No options in portfolio yet. Add some below! 🤔")
         else:
-            df_o = opt_df.copy()
-            df_o["Position Value"] = df_o["contracts_held"] * 100 * df_o["current_price"]
-            df_o["Currently Invested"] = df_o["contracts_held"] * 100 * df_o["avg_cost"]
-            if total_account_val > 0:
-                df_o["% of Portfolio"] = (df_o["Position Value"] / total_account_val) * 100
-            else:
-                df_o["% of Portfolio"] = 0
-
-            df_o = df_o[[
-                "symbol", "call_put", "expiration", "strike", "contracts_held",
-                "avg_cost", "current_price", "Currently Invested", "Position Value",
-                "unrealized_pl", "% of Portfolio"
-            ]]
-
-            df_o = df_o.rename(columns={
+            opt_df["Position Value"] = opts_pos_val
+            opt_df["Currently Invested"] = opts_invested
+            opt_df["% of Portfolio"] = (opts_pos_val / total_account_val) * 100 if total_account_val > 0 else 0
+            display_cols = {
                 "symbol": "Symbol",
                 "call_put": "Call/Put",
                 "expiration": "Expiration",
@@ -574,25 +846,18 @@ def show_portfolio_data(is_admin: bool):
                 "contracts_held": "Contracts",
                 "avg_cost": "Avg Cost",
                 "current_price": "Current Price",
-                "unrealized_pl": "Unrealized P/L"
-            })
-
-            def money(x): return f"${x:,.2f}"
-            def percent(x): return f"{x:,.2f}%"
+                "Currently Invested": "Currently Invested",
+                "Position Value": "Position Value",
+                "unrealized_pl": "Unrealized P/L",
+                "% of Portfolio": "% of Portfolio"
+            }
+            df_o = opt_df[list(display_cols)]
+            df_o.columns = list(display_cols.values())
 
             styled_opts = (
                 df_o.style
-                .format({
-                    "Strike": money,
-                    "Contracts": "{:.2f}",
-                    "Avg Cost": money,
-                    "Current Price": money,
-                    "Currently Invested": money,
-                    "Position Value": money,
-                    "Unrealized P/L": money,
-                    "% of Portfolio": percent
-                })
-                .map(color_unreal_pl, subset=["Unrealized P/L"])
+                .format(OPTIONS_TABLE_FORMAT)
+                .apply(color_unreal_pl, subset=["Unrealized P/L"])
             )
             row_height = 40
             num_rows = len(df_o)
@@ -603,55 +868,56 @@ def show_portfolio_data(is_admin: bool):
         # Show editing only if admin
         if is_admin:
             st.subheader("Add / Update an Option 🔧")
-            existing_opts = []
-            if not opt_df.empty:
-                for _, ro in opt_df.iterrows():
-                    row_label = f"{ro['id']}: {ro['symbol']} {ro['call_put']} {ro['strike']} exp={ro['expiration']}"
-                    existing_opts.append(row_label)
+            opt_by_id = opt_df.set_index("id").to_dict("index") if not opt_df.empty else {}
+            existing_opts = [
+                f"{ro.id}: {ro.symbol} {ro.call_put} {ro.strike} exp={ro.expiration}"
+                for ro in opt_df.itertuples(index=False)
+            ] if not opt_df.empty else []
 
             chosen_opt = st.selectbox("Select existing Option or (New)", existing_opts + ["(New)"])
-            if chosen_opt == "(New)":
-                opt_id = None
-                symbol_input = st.text_input("Option Symbol (e.g. SPY)")
-                call_put_input = st.selectbox("CALL or PUT", ["CALL", "PUT"])
-                exp_in = st.date_input("Expiration Date")
-                strike_in = st.number_input("Strike", step=1.0)
-                old_contracts = 0.0
-                old_avg = 0.0
-            else:
-                row_id = int(chosen_opt.split(":")[0])
-                row_data = opt_df[opt_df["id"] == row_id].squeeze()
-                opt_id = row_id
-                symbol_input = row_data["symbol"]
-                call_put_input = row_data["call_put"]
-                exp_in = row_data["expiration"]
-                strike_in = float(row_data["strike"])
-                old_contracts = float(row_data["contracts_held"])
-                old_avg = float(row_data["avg_cost"])
-
-            contracts_to_add = st.number_input("Contracts to Add (negative to reduce)", step=1.0)
-            purchase_price_opt = st.number_input("Filled Price (per contract)", step=1.0)
+            with st.form("add_option"):
+                if chosen_opt == "(New)":
+                    opt_id = None
+                    symbol_input = st.text_input("Option Symbol (e.g. SPY)")
+                    call_put_input = st.selectbox("CALL or PUT", ["CALL", "PUT"])
+                    exp_in = st.date_input("Expiration Date")
+                    strike_in = st.number_input("Strike", step=1.0)
+                    old_contracts = 0.0
+                    old_avg = 0.0
+                else:
+                    row_id = int(chosen_opt.split(":")[0])
+                    row_data = opt_by_id[row_id]
+                    opt_id = row_id
+                    symbol_input = row_data["symbol"]
+                    call_put_input = row_data["call_put"]
+                    exp_in = row_data["expiration"]
+                    strike_in = float(row_data["strike"])
+                    old_contracts = float(row_data["contracts_held"])
+                    old_avg = float(row_data["avg_cost"])
+
+                contracts_to_add = st.number_input("Contracts to Add (negative to reduce)", step=1.0)
+                purchase_price_opt = st.number_input("Filled Price (per contract)", step=1.0)
+                submitted_opt = st.form_submit_button("Submit (Options)")
 
             if isinstance(exp_in, datetime.date):
                 exp_str = exp_in.strftime("%Y-%m-%d")
             else:
                 exp_str = str(exp_in)
 
-            if st.button("Submit (Options)"):
+            if submitted_opt:
                 total_contracts = old_contracts + contracts_to_add
                 if total_contracts < 0:
                     st.error("Cannot have negative total contracts.")
                     st.stop()
                 elif total_contracts == 0:
                     if opt_id is not None:
-                        delete_option(opt_id)
-                        st.warning("Option closed out entirely. 🗑️")
+                        delete_options([opt_id])
                         if contracts_to_add != 0:
                             log_options_activity(
                                 opt_id, symbol_input, call_put_input, exp_str, strike_in,
                                 contracts_to_add, purchase_price_opt
                             )
-                        refresh()
+                        refresh("Option closed out entirely. 🗑️")
                 else:
                     new_avg_opt = 0.0
                     if old_contracts + contracts_to_add != 0:
@@ -675,27 +941,25 @@ def show_portfolio_data(is_admin: bool):
                             opt_id, symbol_input, call_put_input, exp_str, strike_in,
                             contracts_to_add, purchase_price_opt
                         )
-                    st.success(
+                    refresh(
                         f"✅ Updated Option: {symbol_input} {call_put_input}, "
                         f"total_contracts={total_contracts:.2f}, avg={new_avg_opt:.2f}"
                     )
-                    refresh()
 
-            st.subheader("Delete an Option Entirely 🗑️")
-            del_opt_sel = st.selectbox("Select Option to Delete", ["(None)"] + existing_opts)
-            if del_opt_sel != "(None)":
+            st.subheader("Delete Options Entirely 🗑️")
+            del_opt_sel = st.multiselect("Select Options to Delete", existing_opts)
+            if del_opt_sel:
                 if st.button("Confirm Delete (Option)"):
-                    del_id = int(del_opt_sel.split(":")[0])
-                    delete_option(del_id)
-                    st.warning(f"🗑️ Deleted option ID {del_id}.")
-                    refresh()
+                    del_ids = [int(label.split(":")[0]) for label in del_opt_sel]
+                    delete_options(del_ids)
+                    refresh(f"🗑️ Deleted option ID(s) {', '.join(map(str, del_ids))}.")
 
     # --------------------- PERFORMANCE TAB ---------------------
     with tab_perf:
         st.markdown("## Performance History 📊")
         perf_df = load_performance()
         if not perf_df.empty:
-            perf_df = perf_df.sort_values("date")
+            import altair as alt  # deferred: only this chart needs it
             perf_df.rename(columns={'date': 'Date', 'total_value': 'Portfolio Value'}, inplace=True)
             chart = (
                 alt.Chart(perf_df)